@@ -1,19 +1,86 @@
-import ast
-import json
+from __future__ import annotations
+
 import sys
+from dataclasses import dataclass, fields
 from pathlib import Path
 from typing import Dict, List, Any, Optional
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
 
-# Constants 
+# Constants
 HISTORY_FILE = Path("history.json")
 MAX_FUNCTION_LINES = 20
 MAX_FILE_LINES = 300
+MAX_FILE_BYTES = 2 * 1024 * 1024
 DEFAULT_SCORE = 100
 
-console = Console()
+# rich costs tens of ms to import, so it stays off the library code paths
+# (tests, programmatic use) and is only pulled in when the CLI renders.
+_console_instance = None
+
+
+def _console():
+    global _console_instance
+    if _console_instance is None:
+        from rich.console import Console
+
+        _console_instance = Console()
+    return _console_instance
+
+
+@dataclass(slots=True)
+class Metrics:
+    """Structural metrics extracted from a single source file."""
+
+    lines: int
+    functions: int
+    imports: int
+    docstrings: int
+    type_hints: int
+    long_functions: int
+
+
+# Display labels for the fixed Metrics schema, computed once at import.
+_METRIC_LABELS = tuple(
+    (f.name, f.name.replace("_", " ").capitalize()) for f in fields(Metrics)
+)
+
+
+# Parsed trees keyed by (path, st_mtime_ns, st_size); a stale entry can never
+# match because any edit changes the key.
+_parse_cache: Dict[tuple, tuple] = {}
+_PARSE_CACHE_MAX = 128
+
+
+def _scan_tree(tree: ast.AST) -> tuple:
+    """Walks the tree once with an explicit stack, returning
+    (functions, imports, docstrings, type_hints, long_functions)."""
+    import ast
+
+    functions = imports = docstrings = type_hints = long_functions = 0
+
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        node_type = type(node)
+        if node_type is ast.FunctionDef or node_type is ast.AsyncFunctionDef:
+            functions += 1
+            # Inline of ast.get_docstring's check, minus the cleandoc rewrite
+            # we don't need for a yes/no answer.
+            body = node.body
+            if body:
+                first = body[0]
+                if type(first) is ast.Expr:
+                    value = first.value
+                    if type(value) is ast.Constant and type(value.value) is str:
+                        docstrings += 1
+            if node.returns is not None or any(arg.annotation for arg in node.args.args):
+                type_hints += 1
+            if (node.end_lineno - node.lineno) > MAX_FUNCTION_LINES:
+                long_functions += 1
+        elif node_type is ast.Import or node_type is ast.ImportFrom:
+            imports += 1
+        stack.extend(ast.iter_child_nodes(node))
+
+    return functions, imports, docstrings, type_hints, long_functions
 
 
 class CodeAnalyzer:
@@ -21,67 +88,103 @@ class CodeAnalyzer:
 
     def __init__(self, filepath: Path):
         self.filepath = filepath
-        self.metrics: Dict[str, int] = {}
+        self.metrics: Optional[Metrics] = None
+        self._source: Optional[bytes] = None
+
+    @classmethod
+    def from_source(cls, source) -> "CodeAnalyzer":
+        """Builds an analyzer over in-memory source, bypassing the filesystem."""
+        analyzer = cls(Path("<source>"))
+        analyzer._source = source.encode("utf-8") if isinstance(source, str) else source
+        return analyzer
 
-    def analyze(self) -> Dict[str, int]:
+    def analyze(self) -> Metrics:
         """Parses the source code using AST and calculates key metrics."""
+        import ast
+
         try:
-            source = self.filepath.read_text(encoding="utf-8")
-            tree = ast.parse(source)
-        except (SyntaxError, UnicodeDecodeError) as e:
-            console.print(f"[bold red]Parsing Error:[/bold red] {e}")
+            if self._source is not None:
+                source = self._source
+                lines = source.count(b"\n") + (1 if source and not source.endswith(b"\n") else 0)
+                tree = ast.parse(source, filename=str(self.filepath))
+            else:
+                st = self.filepath.stat()
+                key = (self.filepath, st.st_mtime_ns, st.st_size)
+                cached = _parse_cache.get(key)
+                if cached is not None:
+                    tree, lines = cached
+                else:
+                    source = self.filepath.read_bytes()
+                    lines = source.count(b"\n") + (1 if source and not source.endswith(b"\n") else 0)
+                    tree = ast.parse(source, filename=str(self.filepath))
+                    if len(_parse_cache) >= _PARSE_CACHE_MAX:
+                        _parse_cache.clear()
+                    _parse_cache[key] = (tree, lines)
+        except (SyntaxError, UnicodeDecodeError, ValueError) as e:
+            print(f"Parsing Error: {e}", file=sys.stderr)
             sys.exit(1)
 
-        functions = [n for n in ast.walk(tree) if isinstance(n, ast.FunctionDef)]
-        
-        self.metrics = {
-            "lines": len(source.splitlines()),
-            "functions": len(functions),
-            "imports": len([n for n in ast.walk(tree) if isinstance(n, (ast.Import, ast.ImportFrom))]),
-            "docstrings": len([n for n in functions if ast.get_docstring(n)]),
-            "type_hints": self._count_type_hints(functions),
-            "long_functions": self._count_long_functions(functions),
-        }
+        functions, imports, docstrings, type_hints, long_functions = _scan_tree(tree)
+
+        self.metrics = Metrics(
+            lines=lines,
+            functions=functions,
+            imports=imports,
+            docstrings=docstrings,
+            type_hints=type_hints,
+            long_functions=long_functions,
+        )
         return self.metrics
 
-    def _count_type_hints(self, functions: List[ast.FunctionDef]) -> int:
-        """Counts how many functions utilize type hinting for arguments or return values."""
-        count = 0
-        for node in functions:
-            has_return_hint = node.returns is not None
-            has_args_hint = any(arg.annotation for arg in node.args.args)
-            if has_return_hint or has_args_hint:
-                count += 1
-        return count
 
-    def _count_long_functions(self, functions: List[ast.FunctionDef]) -> int:
-        """Identifies functions exceeding the defined line limit."""
-        return sum(1 for n in functions if (n.end_lineno - n.lineno) > MAX_FUNCTION_LINES)
+def _score_kernel(functions: int, docstrings: int, type_hints: int, long_functions: int, lines: int) -> int:
+    """Pure integer scoring logic, JIT-compiled when numba is available.
+
+    Written branchlessly: each comparison contributes 0 or 1 and scales its
+    penalty, so the whole body is integer arithmetic with no conditional
+    jumps. Documentation and type-safety penalties only apply when the file
+    defines functions at all.
+    """
+    penalty = (
+        30 * int(functions == 0)
+        + 10 * int(functions > 0 and docstrings < functions)
+        + 10 * int(functions > 0 and type_hints < functions)
+        + 10 * int(long_functions > 0)
+        + 10 * int(lines > MAX_FILE_LINES)
+    )
+    return max(DEFAULT_SCORE - penalty, 0)
+
+
+try:
+    import numba
+
+    _score_kernel = numba.njit(cache=True)(_score_kernel)
+except ImportError:
+    pass
+
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+# History files larger than this are reduced with numpy (when installed);
+# roughly a thousand scores at ~4 bytes per line.
+_NUMPY_STATS_MIN_BYTES = 4096
 
 
 class ScoreEngine:
     """Handles the logic for grading the code based on extracted metrics."""
 
     @staticmethod
-    def calculate(metrics: Dict[str, int]) -> int:
+    def calculate(metrics: Metrics) -> int:
         """Calculates a final score out of 100 based on best practices."""
-        score = DEFAULT_SCORE
-
-        if metrics["functions"] == 0:
-            score -= 30
-        else:
-            # Penalize for missing documentation or type safety
-            if metrics["docstrings"] < metrics["functions"]:
-                score -= 10
-            if metrics["type_hints"] < metrics["functions"]:
-                score -= 10
-
-        if metrics["long_functions"] > 0:
-            score -= 10
-        if metrics["lines"] > MAX_FILE_LINES:
-            score -= 10
-
-        return max(score, 0)
+        return int(_score_kernel(
+            metrics.functions,
+            metrics.docstrings,
+            metrics.type_hints,
+            metrics.long_functions,
+            metrics.lines,
+        ))
 
 
 class HistoryStore:
@@ -92,50 +195,139 @@ class HistoryStore:
 
     def save_score(self, score: int) -> None:
         """Appends a new score to the historical data."""
-        history = self.get_all()
-        history.append(score)
         try:
-            self.filename.write_text(json.dumps(history), encoding="utf-8")
+            self._repair_torn_tail()
+            with self.filename.open("ab") as f:
+                f.write(str(score).encode() + b"\n")
         except IOError as e:
-            console.print(f"[yellow]Warning: Persistent storage failed: {e}[/yellow]")
+            print(f"Warning: Persistent storage failed: {e}", file=sys.stderr)
+
+    def _repair_torn_tail(self) -> None:
+        """Truncates a final line left unterminated by an interrupted append,
+        so the next score cannot be glued onto the torn fragment."""
+        try:
+            with self.filename.open("r+b") as f:
+                size = f.seek(0, 2)
+                if size == 0:
+                    return
+                f.seek(size - 1)
+                if f.read(1) == b"\n":
+                    return
+                back = min(size, 64)
+                f.seek(size - back)
+                cut = f.read(back).rfind(b"\n")
+                if cut != -1:
+                    f.truncate(size - back + cut + 1)
+                elif back == size:
+                    f.truncate(0)
+        except FileNotFoundError:
+            pass
 
     def get_all(self) -> List[int]:
-        """Retrieves all previous scores from the history file."""
+        """Retrieves all previous scores from the history file.
+
+        A line truncated by an interrupted append is skipped rather than
+        discarding the whole history, so a crash mid-write loses at most
+        the score being written.
+        """
         if not self.filename.exists():
             return []
         try:
-            return json.loads(self.filename.read_text(encoding="utf-8"))
-        except (json.JSONDecodeError, IOError):
+            raw = self.filename.read_bytes()
+        except IOError:
             return []
+        lines = raw.split(b"\n")
+        if lines[-1]:
+            # No trailing newline: the final append was interrupted and may
+            # hold a truncated (yet still parseable) score. Drop it.
+            lines.pop()
+        scores = []
+        for line in lines:
+            if not line:
+                continue
+            try:
+                scores.append(int(line))
+            except ValueError:
+                continue
+        return scores
 
     def get_statistics(self) -> Dict[str, Any]:
-        """Calculates aggregate statistics from the history."""
-        history = self.get_all()
-        if not history:
-            return {"runs": 0, "average": 0, "best": 0}
+        """Calculates aggregate statistics from the history in one streaming pass."""
+        runs = 0
+        total = 0
+        best = 0
+        if self.filename.exists():
+            try:
+                size = self.filename.stat().st_size
+                if _np is not None and size > _NUMPY_STATS_MIN_BYTES:
+                    with self.filename.open("rb") as f:
+                        f.seek(-1, 2)
+                        complete = f.read(1) == b"\n"
+                    if complete:
+                        try:
+                            scores = _np.loadtxt(self.filename, dtype=_np.int64, ndmin=1)
+                            return {
+                                "runs": int(scores.size),
+                                "average": float(scores.mean()),
+                                "best": int(scores.max()),
+                            }
+                        except ValueError:
+                            pass
+                with self.filename.open("rb") as f:
+                    for line in f:
+                        # A final line without a newline is a torn append and
+                        # may be truncated; skip it like get_all does.
+                        if not line.endswith(b"\n"):
+                            continue
+                        try:
+                            value = int(line)
+                        except ValueError:
+                            continue
+                        runs += 1
+                        total += value
+                        if value > best:
+                            best = value
+            except IOError:
+                return {"runs": 0, "average": 0, "best": 0}
         return {
-            "runs": len(history),
-            "average": sum(history) / len(history),
-            "best": max(history),
+            "runs": runs,
+            "average": total / runs if runs else 0,
+            "best": best,
         }
 
 
-def render_dashboard(filepath: Path, metrics: Dict[str, int], score: int, stats: Dict[str, Any]) -> None:
+# Score thresholds and their panel colors, highest first.
+_SCORE_COLORS = ((80, "green"), (60, "yellow"), (0, "red"))
+
+# Static column specs for the metrics table; the Table itself is built fresh
+# per render since rich tables accumulate cell state and are cheap to create.
+_TABLE_COLUMNS = (
+    ("Metric", {"style": "white"}),
+    ("Value", {"justify": "right", "style": "green"}),
+)
+
+
+def render_dashboard(filepath: Path, metrics: Metrics, score: int, stats: Dict[str, Any]) -> None:
     """Displays a rich, formatted dashboard in the terminal."""
+    from rich.panel import Panel
+    from rich.table import Table
+
+    console = _console()
+
     # Metrics Table
     table = Table(title="Code Quality Metrics", title_style="bold cyan")
-    table.add_column("Metric", style="white")
-    table.add_column("Value", justify="right", style="green")
+    for header, options in _TABLE_COLUMNS:
+        table.add_column(header, **options)
 
-    for key, value in metrics.items():
-        table.add_row(key.replace("_", " ").capitalize(), str(value))
+    for name, label in _METRIC_LABELS:
+        table.add_row(label, str(getattr(metrics, name)))
 
     # Header and Main Table
     console.print(Panel(f"Target File: [bold yellow]{filepath.name}[/bold yellow]", subtitle="Analysis Engine v2.0"))
     console.print(table)
     
     # Conditional coloring for the score
-    score_color = "green" if score >= 80 else "yellow" if score >= 60 else "red"
+    score_color = next(color for threshold, color in _SCORE_COLORS if score >= threshold)
     console.print(Panel(f"Final Score: [bold {score_color}]{score}/100[/bold {score_color}]", expand=False))
 
     # Historical Stats
@@ -150,19 +342,25 @@ def render_dashboard(filepath: Path, metrics: Dict[str, int], score: int, stats:
 def main() -> None:
     """Main execution flow."""
     if len(sys.argv) != 2:
-        console.print("[bold red]Usage:[/bold red] python analyzer.py <path_to_file.py>")
+        _console().print("[bold red]Usage:[/bold red] python analyzer.py <path_to_file.py>")
         sys.exit(1)
 
     file_path = Path(sys.argv[1])
 
     if not file_path.is_file() or file_path.suffix != ".py":
-        console.print(f"[bold red]Error:[/bold red] Invalid Python file: {file_path}")
+        _console().print(f"[bold red]Error:[/bold red] Invalid Python file: {file_path}")
         sys.exit(1)
 
-    # 1. Analyze
-    analyzer = CodeAnalyzer(file_path)
-    metrics = analyzer.analyze()
-    
+    # 1. Analyze (a stat call settles the degenerate cases before parsing)
+    size = file_path.stat().st_size
+    if size > MAX_FILE_BYTES:
+        _console().print(f"[yellow]Warning: {file_path} is {size} bytes; analysis may be slow.[/yellow]")
+    if size == 0:
+        metrics = Metrics(lines=0, functions=0, imports=0, docstrings=0, type_hints=0, long_functions=0)
+    else:
+        analyzer = CodeAnalyzer(file_path)
+        metrics = analyzer.analyze()
+
     # 2. Grade
     score = ScoreEngine.calculate(metrics)
     